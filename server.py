@@ -1,35 +1,232 @@
 #!/usr/bin/env python3
 import asyncio
+import bisect
+import calendar
+import itertools
 import json
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import date as Date, timedelta
+from typing import Iterable, List, Dict, Any, Optional, Tuple
 import aiohttp
+import orjson
 from fastmcp import FastMCP
 
 # Load configuration (TODO: read from file)
 config = {
   "backend_url": "http://localhost:3001",
   "default_entity_id": "1",
-  "timeout_seconds": 30
+  "timeout_seconds": 30,
+  "cache_ttl_seconds": 60,
+  "use_range_endpoint": False
 }
 
-mcp = FastMCP("Reservo MCP")
+@dataclass(slots=True)
+class Reservation:
+    id: str
+    booked_by: str
+    start: Date
+    end: Date
+    created_at: str
+    # Day ordinals of start/end, so hot comparisons are plain int compares
+    start_ord: int = field(init=False)
+    end_ord: int = field(init=False)
+    
+    def __post_init__(self):
+        self.start_ord = self.start.toordinal()
+        self.end_ord = self.end.toordinal()
+
+class ReservationIndex:
+    """Reservations sorted by start date, with a running max of end dates so
+    overlap queries stay correct when reservations overlap each other"""
+    
+    __slots__ = ('reservations', 'start_ords', 'max_end_ords')
+    
+    def __init__(self, reservations: Iterable[Reservation]):
+        self.reservations = sorted(reservations, key=lambda reservation: reservation.start_ord)
+        self.start_ords = [reservation.start_ord for reservation in self.reservations]
+        self.max_end_ords = list(itertools.accumulate((reservation.end_ord for reservation in self.reservations), max))
+    
+    def overlapping(self, start_ord: int, end_ord: int) -> List[Reservation]:
+        """Get reservations overlapping [start_ord, end_ord) in start order"""
+        # Nothing before lo ends after start_ord, nothing from hi on starts before end_ord
+        lo = bisect.bisect_right(self.max_end_ords, start_ord)
+        hi = bisect.bisect_left(self.start_ords, end_ord)
+        return [reservation for reservation in self.reservations[lo:hi] if reservation.end_ord > start_ord]
 
 class ReservationClient:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, timeout_seconds: float = 30, cache_ttl_seconds: float = 60,
+                 use_range_endpoint: bool = False):
         self.base_url = base_url.rstrip('/')
+        self.timeout_seconds = timeout_seconds
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.use_range_endpoint = use_range_endpoint
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cache: Dict[Tuple[Any, ...], Tuple[float, ReservationIndex]] = {}
+        self._locks: Dict[Tuple[Any, ...], asyncio.Lock] = {}
     
-    async def get_reservations(self, entity_id: str, year: int, month: int) -> List[Dict[str, Any]]:
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Lazily create the shared HTTP session (reuses pooled connections)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+                connector=aiohttp.TCPConnector(limit=50, ttl_dns_cache=300, keepalive_timeout=60)
+            )
+        return self._session
+    
+    async def close(self) -> None:
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _get_cached(self, key: Tuple[Any, ...]) -> Optional[ReservationIndex]:
+        entry = self._cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.cache_ttl_seconds:
+            return entry[1]
+        return None
+    
+    def _store_cached(self, key: Tuple[Any, ...], reservations: ReservationIndex) -> None:
+        """Cache reservations under key, dropping any entries that have expired"""
+        now = time.monotonic()
+        expired = [k for k, (fetched_at, _) in self._cache.items() if now - fetched_at >= self.cache_ttl_seconds]
+        for k in expired:
+            del self._cache[k]
+        self._cache[key] = (now, reservations)
+    
+    async def _fetch_reservations(self, key: Tuple[Any, ...], url: str) -> Optional[ReservationIndex]:
+        """
+        Fetch and index reservations from url (cached under key for cache_ttl_seconds).
+        
+        Returns None if the backend doesn't answer with a successful response.
+        """
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached
+        
+        # Concurrent misses on the same key share a single backend request
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                return await self._fetch_locked(key, url)
+        finally:
+            # Callers already waiting keep their reference; later misses get a fresh lock
+            if self._locks.get(key) is lock:
+                del self._locks[key]
+    
+    async def _fetch_locked(self, key: Tuple[Any, ...], url: str) -> Optional[ReservationIndex]:
+        cached = self._get_cached(key)
+        if cached is not None:
+            return cached
+        
+        session = await self._get_session()
+        async with session.get(url) as response:
+            if response.status != 200:
+                return None
+            try:
+                data = orjson.loads(await response.read())
+            except orjson.JSONDecodeError:
+                return None
+        if not data.get('success'):
+            return None
+        
+        # Parse reservation dates once at ingest so checks can compare dates directly.
+        # Only the calendar date is used, so parse the YYYY-MM-DD prefix of the timestamp.
+        reservations = ReservationIndex(
+            Reservation(
+                id=item['reservationId'],
+                booked_by=item['bookedBy'],
+                start=Date.fromisoformat(item['startDate'][:10]),
+                end=Date.fromisoformat(item['endDate'][:10]),
+                created_at=item['createdAt']
+            )
+            for item in data.get('data', [])
+        )
+        
+        self._store_cached(key, reservations)
+        return reservations
+    
+    async def get_reservations(self, entity_id: str, year: int, month: int) -> ReservationIndex:
         """Get reservations for a specific month"""
-        async with aiohttp.ClientSession() as session:
-            url = f"{self.base_url}/api/entities/{entity_id}/reservations?year={year}&month={month}"
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('data', []) if data.get('success') else []
-                return []
+        url = f"{self.base_url}/api/entities/{entity_id}/reservations?year={year}&month={month}"
+        reservations = await self._fetch_reservations((entity_id, year, month), url)
+        return reservations if reservations is not None else ReservationIndex([])
+    
+    async def get_reservations_range(self, entity_id: str, first_month: Tuple[int, int],
+                                     last_month: Tuple[int, int]) -> Optional[ReservationIndex]:
+        """
+        Get reservations for the whole months from first_month through last_month, given as (year, month).
+        
+        Queries are month-aligned so lookups within the same months share a cache entry.
+        Returns None if the range endpoint is disabled or the request fails, so callers can
+        fall back to get_reservations.
+        """
+        if not self.use_range_endpoint:
+            return None
+        
+        start = Date(first_month[0], first_month[1], 1)
+        end = Date(last_month[0], last_month[1], calendar.monthrange(*last_month)[1])
+        url = f"{self.base_url}/api/entities/{entity_id}/reservations?start={start.isoformat()}&end={end.isoformat()}"
+        try:
+            return await self._fetch_reservations((entity_id, first_month, last_month), url)
+        except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError):
+            return None
 
-client = ReservationClient(config['backend_url'])
+client = ReservationClient(
+    config['backend_url'],
+    config['timeout_seconds'],
+    config['cache_ttl_seconds'],
+    config['use_range_endpoint']
+)
+
+@asynccontextmanager
+async def lifespan(server):
+    try:
+        yield
+    finally:
+        await client.close()
+
+mcp = FastMCP("Reservo MCP", lifespan=lifespan)
+
+async def _load_reservations_for_range(entity_id: str, range_start: Date, range_end: Date) -> ReservationIndex:
+    """Get reservations for every month touched by [range_start, range_end)"""
+    start_idx = range_start.year * 12 + (range_start.month - 1)
+    last_day = range_end - timedelta(days=1)
+    end_idx = last_day.year * 12 + (last_day.month - 1)
+    months_to_check = [(idx // 12, idx % 12 + 1) for idx in range(start_idx, end_idx + 1)]
+    
+    reservations = await client.get_reservations_range(entity_id, months_to_check[0], months_to_check[-1])
+    if reservations is not None:
+        return reservations
+    
+    # Range endpoint disabled or unavailable: fetch all months concurrently, bounded to avoid overwhelming the backend
+    semaphore = asyncio.Semaphore(10)
+    
+    async def fetch_month(year: int, month: int) -> ReservationIndex:
+        async with semaphore:
+            return await client.get_reservations(entity_id, year, month)
+    
+    results = await asyncio.gather(*(fetch_month(year, month) for year, month in months_to_check))
+    if len(results) == 1:
+        return results[0]
+    
+    # Reservations spanning a month boundary are returned for each month they touch
+    unique = {
+        reservation.id: reservation
+        for month_reservations in results
+        for reservation in month_reservations.reservations
+    }
+    return ReservationIndex(unique.values())
+
+def _format_reservation(reservation: Reservation) -> Dict[str, Any]:
+    return {
+        'id': reservation.id,
+        'booked_by': reservation.booked_by,
+        'start_date': reservation.start.strftime('%Y-%m-%d'),
+        'end_date': reservation.end.strftime('%Y-%m-%d'),
+        'created_at': reservation.created_at
+    }
 
 @mcp.tool()
 async def check_date_availability(entity_id: str, date: str) -> Dict[str, Any]:
@@ -44,30 +241,20 @@ async def check_date_availability(entity_id: str, date: str) -> Dict[str, Any]:
         Dictionary with availability status and reservation details if occupied
     """
     try:
-        check_date = datetime.strptime(date, '%Y-%m-%d')
-        year = check_date.year
-        month = check_date.month
-        
-        reservations = await client.get_reservations(entity_id, year, month)
-        
-        # Check if date falls within any reservation
-        for reservation in reservations:
-            start_date = datetime.fromisoformat(reservation['startDate'].replace('Z', '+00:00'))
-            end_date = datetime.fromisoformat(reservation['endDate'].replace('Z', '+00:00'))
-            
-            if start_date.date() <= check_date.date() < end_date.date():
-                return {
-                    'available': False,
-                    'date': date,
-                    'entity_id': entity_id,
-                    'reservation': {
-                        'id': reservation['reservationId'],
-                        'booked_by': reservation['bookedBy'],
-                        'start_date': start_date.strftime('%Y-%m-%d'),
-                        'end_date': end_date.strftime('%Y-%m-%d'),
-                        'created_at': reservation['createdAt']
-                    }
-                }
+        check_date = Date.fromisoformat(date)
+        # The day after date.max can't be represented; clamping still loads the same month
+        day_after = min(check_date, Date.max - timedelta(days=1)) + timedelta(days=1)
+        reservations = await _load_reservations_for_range(entity_id, check_date, day_after)
+        
+        check_ord = check_date.toordinal()
+        occupying = reservations.overlapping(check_ord, check_ord + 1)
+        if occupying:
+            return {
+                'available': False,
+                'date': date,
+                'entity_id': entity_id,
+                'reservation': _format_reservation(occupying[0])
+            }
         
         return {
             'available': True,
@@ -99,42 +286,18 @@ async def check_date_range_availability(entity_id: str, start_date: str, end_dat
         Dictionary with availability status, conflicts, and available periods
     """
     try:
-        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+        range_start = Date.fromisoformat(start_date)
+        range_end = Date.fromisoformat(end_date)
         
-        if start_dt >= end_dt:
+        if range_start >= range_end:
             return {'error': 'Start date must be before end date'}
         
-        # Get reservations for all months in the range
-        months_to_check = set()
-        current = start_dt.replace(day=1)
-        while current <= end_dt:
-            months_to_check.add((current.year, current.month))
-            if current.month == 12:
-                current = current.replace(year=current.year + 1, month=1)
-            else:
-                current = current.replace(month=current.month + 1)
-        
-        all_reservations = []
-        for year, month in months_to_check:
-            reservations = await client.get_reservations(entity_id, year, month)
-            all_reservations.extend(reservations)
-        
-        # Find conflicts
-        conflicts = []
-        for reservation in all_reservations:
-            res_start = datetime.fromisoformat(reservation['startDate'].replace('Z', '+00:00')).date()
-            res_end = datetime.fromisoformat(reservation['endDate'].replace('Z', '+00:00')).date()
-            
-            # Check for overlap: start < res_end AND end > res_start
-            if start_dt.date() < res_end and end_dt.date() > res_start:
-                conflicts.append({
-                    'id': reservation['reservationId'],
-                    'booked_by': reservation['bookedBy'],
-                    'start_date': res_start.strftime('%Y-%m-%d'),
-                    'end_date': res_end.strftime('%Y-%m-%d'),
-                    'created_at': reservation['createdAt']
-                })
+        reservations = await _load_reservations_for_range(entity_id, range_start, range_end)
+        
+        start_ord = range_start.toordinal()
+        end_ord = range_end.toordinal()
+        overlapping = reservations.overlapping(start_ord, end_ord)
+        conflicts = [_format_reservation(reservation) for reservation in overlapping]
         
         if not conflicts:
             return {
@@ -147,54 +310,24 @@ async def check_date_range_availability(entity_id: str, start_date: str, end_dat
                 'message': f'Entity {entity_id} is completely available from {start_date} to {end_date}'
             }
         
-        # Find available periods within the requested range
+        # Find available periods within the requested range by sweeping the
+        # conflicts in start order; each gap before a conflict is a free period
         available_periods = []
-        current_date = start_dt.date()
-        
-        while current_date < end_dt.date():
-            # Check if current_date is free
-            is_free = True
-            blocking_reservation = None
-            
-            for conflict in conflicts:
-                conflict_start = datetime.strptime(conflict['start_date'], '%Y-%m-%d').date()
-                conflict_end = datetime.strptime(conflict['end_date'], '%Y-%m-%d').date()
-                
-                if conflict_start <= current_date < conflict_end:
-                    is_free = False
-                    blocking_reservation = conflict
-                    break
-            
-            if is_free:
-                # Find the end of this available period
-                period_end = current_date
-                while period_end < end_dt.date():
-                    next_day = period_end + timedelta(days=1)
-                    is_next_free = True
-                    
-                    for conflict in conflicts:
-                        conflict_start = datetime.strptime(conflict['start_date'], '%Y-%m-%d').date()
-                        conflict_end = datetime.strptime(conflict['end_date'], '%Y-%m-%d').date()
-                        
-                        if conflict_start <= next_day < conflict_end:
-                            is_next_free = False
-                            break
-                    
-                    if is_next_free:
-                        period_end = next_day
-                    else:
-                        break
-                
+        cursor = start_ord
+        
+        for reservation in overlapping:
+            if cursor < reservation.start_ord:
                 available_periods.append({
-                    'start_date': current_date.strftime('%Y-%m-%d'),
-                    'end_date': period_end.strftime('%Y-%m-%d')
+                    'start_date': Date.fromordinal(cursor).strftime('%Y-%m-%d'),
+                    'end_date': reservation.start.strftime('%Y-%m-%d')
                 })
-                
-                current_date = period_end + timedelta(days=1)
-            else:
-                # Skip to the end of the blocking reservation
-                conflict_end = datetime.strptime(blocking_reservation['end_date'], '%Y-%m-%d').date()
-                current_date = conflict_end
+            cursor = max(cursor, reservation.end_ord)
+        
+        if cursor < end_ord:
+            available_periods.append({
+                'start_date': Date.fromordinal(cursor).strftime('%Y-%m-%d'),
+                'end_date': range_end.strftime('%Y-%m-%d')
+            })
         
         return {
             'available': False,
@@ -218,4 +351,10 @@ async def check_date_range_availability(entity_id: str, start_date: str, end_dat
         }
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     mcp.run()
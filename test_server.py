@@ -0,0 +1,239 @@
+import asyncio
+import json
+
+import pytest
+
+import server
+
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    async def __aenter__(self):
+        if isinstance(self.body, Exception):
+            raise self.body
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def read(self):
+        if isinstance(self.body, bytes):
+            return self.body
+        return json.dumps(self.body).encode()
+
+
+class FakeSession:
+    """Answers GET requests from a {query: (status, body)} table; unknown queries get a 404"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+        self.closed = False
+
+    def get(self, url):
+        query = url.split('?', 1)[1]
+        self.requests.append(query)
+        status, body = self.routes.get(query, (404, {}))
+        return FakeResponse(status, body)
+
+    async def close(self):
+        self.closed = True
+
+
+def reservation(reservation_id, start, end):
+    return {
+        'reservationId': reservation_id,
+        'bookedBy': 'John Doe',
+        'startDate': f'{start}T00:00:00.000Z',
+        'endDate': f'{end}T00:00:00.000Z',
+        'createdAt': '2024-01-01T10:00:00Z'
+    }
+
+
+def ok(*reservations):
+    return 200, {'success': True, 'data': list(reservations)}
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Point the server at a fresh client whose HTTP session is a FakeSession"""
+    def install(routes, use_range_endpoint=False):
+        session = FakeSession(routes)
+        client = server.ReservationClient('http://backend', use_range_endpoint=use_range_endpoint)
+
+        async def get_session():
+            return session
+
+        monkeypatch.setattr(client, '_get_session', get_session)
+        monkeypatch.setattr(server, 'client', client)
+        return session
+    return install
+
+
+def call(tool, *args):
+    # Depending on the fastmcp version, @mcp.tool() returns the function or a tool wrapping it
+    fn = getattr(tool, 'fn', tool)
+    return asyncio.run(fn(*args))
+
+
+def check_range(start_date, end_date):
+    return call(server.check_date_range_availability, '1', start_date, end_date)
+
+
+def check_date(date):
+    return call(server.check_date_availability, '1', date)
+
+
+def test_range_reports_gaps_between_conflicts(backend):
+    backend({'year=2024&month=1': ok(
+        reservation('b', '2024-01-20', '2024-01-25'),
+        reservation('a', '2024-01-16', '2024-01-18')
+    )})
+
+    result = check_range('2024-01-15', '2024-01-30')
+
+    assert result['available'] is False
+    assert [conflict['id'] for conflict in result['conflicts']] == ['a', 'b']
+    assert result['available_periods'] == [
+        {'start_date': '2024-01-15', 'end_date': '2024-01-16'},
+        {'start_date': '2024-01-18', 'end_date': '2024-01-20'},
+        {'start_date': '2024-01-25', 'end_date': '2024-01-30'}
+    ]
+
+
+def test_range_has_no_gap_between_adjacent_reservations(backend):
+    backend({'year=2024&month=1': ok(
+        reservation('a', '2024-01-10', '2024-01-12'),
+        reservation('b', '2024-01-12', '2024-01-15')
+    )})
+
+    result = check_range('2024-01-10', '2024-01-20')
+
+    assert len(result['conflicts']) == 2
+    assert result['available_periods'] == [{'start_date': '2024-01-15', 'end_date': '2024-01-20'}]
+
+
+def test_range_outside_all_reservations_is_available(backend):
+    backend({'year=2024&month=1': ok(reservation('a', '2024-01-10', '2024-01-12'))})
+
+    assert check_range('2024-01-12', '2024-01-20')['available'] is True
+    assert check_range('2024-01-01', '2024-01-10')['available'] is True
+
+
+def test_overlapping_reservations(backend):
+    backend({'year=2024&month=1': ok(
+        reservation('long', '2024-01-01', '2024-01-20'),
+        reservation('nested', '2024-01-05', '2024-01-07')
+    )})
+
+    inside = check_range('2024-01-10', '2024-01-12')
+    assert inside['available'] is False
+    assert [conflict['id'] for conflict in inside['conflicts']] == ['long']
+    assert inside['available_periods'] == []
+
+    around = check_range('2024-01-03', '2024-01-25')
+    assert [conflict['id'] for conflict in around['conflicts']] == ['long', 'nested']
+    assert around['available_periods'] == [{'start_date': '2024-01-20', 'end_date': '2024-01-25'}]
+
+    assert check_date('2024-01-10')['reservation']['id'] == 'long'
+    assert check_date('2024-01-06')['available'] is False
+    assert check_date('2024-01-20')['available'] is True
+
+
+def test_month_spanning_reservation_is_reported_once(backend):
+    spanning = reservation('s', '2024-01-30', '2024-02-02')
+    session = backend({
+        'year=2024&month=1': ok(spanning),
+        'year=2024&month=2': ok(spanning)
+    })
+
+    result = check_range('2024-01-28', '2024-02-05')
+
+    assert [conflict['id'] for conflict in result['conflicts']] == ['s']
+    assert result['available_periods'] == [
+        {'start_date': '2024-01-28', 'end_date': '2024-01-30'},
+        {'start_date': '2024-02-02', 'end_date': '2024-02-05'}
+    ]
+    assert sorted(session.requests) == ['year=2024&month=1', 'year=2024&month=2']
+    assert check_date('2024-02-01')['reservation']['id'] == 's'
+
+
+def test_last_representable_date(backend):
+    backend({'year=9999&month=12': ok(reservation('a', '9999-12-30', '9999-12-31'))})
+
+    assert check_date('9999-12-31')['available'] is True
+    assert check_date('9999-12-30')['available'] is False
+
+
+def test_invalid_dates(backend):
+    backend({})
+
+    assert 'error' in check_date('2024-13-01')
+    assert 'error' in check_range('2024-01-20', '2024-01-10')
+
+
+def test_range_endpoint_is_disabled_by_default(backend):
+    session = backend({'year=2024&month=1': ok(reservation('a', '2024-01-10', '2024-01-15'))})
+
+    assert check_date('2024-01-12')['available'] is False
+    assert session.requests == ['year=2024&month=1']
+
+
+def test_range_endpoint_covers_whole_months(backend):
+    session = backend({
+        'start=2024-01-01&end=2024-01-31': ok(reservation('a', '2024-01-10', '2024-01-15'))
+    }, use_range_endpoint=True)
+
+    assert check_date('2024-01-12')['reservation']['id'] == 'a'
+    assert check_date('2024-01-14')['reservation']['id'] == 'a'
+    assert session.requests == ['start=2024-01-01&end=2024-01-31']
+
+
+@pytest.mark.parametrize('range_response', [
+    (400, {}),
+    (404, {}),
+    (200, {'success': False}),
+    (200, b'<html>Not Found</html>'),
+    (200, asyncio.TimeoutError())
+])
+def test_failed_range_request_falls_back_to_monthly(backend, range_response):
+    session = backend({
+        'start=2024-01-01&end=2024-01-31': range_response,
+        'year=2024&month=1': ok(reservation('a', '2024-01-10', '2024-01-15'))
+    }, use_range_endpoint=True)
+
+    assert check_date('2024-01-12')['reservation']['id'] == 'a'
+    assert session.requests == ['start=2024-01-01&end=2024-01-31', 'year=2024&month=1']
+
+
+def test_non_json_response_is_not_reported_as_bad_input(backend):
+    backend({'year=2024&month=1': (200, b'<html>Bad Gateway</html>')})
+
+    result = check_date('2024-01-12')
+
+    assert 'Invalid date format' not in result.get('error', '')
+    assert server.client._cache == {}
+
+
+def test_concurrent_misses_share_one_request(backend):
+    session = backend({'year=2024&month=1': ok(reservation('a', '2024-01-10', '2024-01-15'))})
+
+    async def fetch_many():
+        return await asyncio.gather(*(server.client.get_reservations('1', 2024, 1) for _ in range(5)))
+
+    results = asyncio.run(fetch_many())
+
+    assert session.requests == ['year=2024&month=1']
+    assert all(result is results[0] for result in results)
+    assert server.client._locks == {}
+
+
+def test_failed_fetch_is_not_cached(backend):
+    backend({})
+
+    assert asyncio.run(server.client.get_reservations('missing', 2024, 1)).reservations == []
+    assert server.client._cache == {}
+    assert server.client._locks == {}